@@ -1,11 +1,17 @@
-from fastapi import FastAPI, HTTPException, Header, Depends, Query, Body
+from fastapi import FastAPI, HTTPException, Header, Depends, Query, Body, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from supabase import create_client, Client
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from supabase import acreate_client, AsyncClient
 from postgrest import APIError
 from typing import Optional, List, Dict, Any
 from dotenv import load_dotenv
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+import hashlib
+import httpx
+import orjson
 import os
+import time
 
 # ------------------ ENV ------------------
 load_dotenv()
@@ -13,7 +19,7 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
 SERVER_API_KEY = os.getenv("API_KEY")
 
-app = FastAPI(title="Research API", version="1.0.0")
+app = FastAPI(title="Research API", version="1.0.0", default_response_class=ORJSONResponse)
 
 # CORS middleware
 app.add_middleware(
@@ -24,6 +30,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large JSON bodies (study lists with abstracts shrink ~5-10x);
+# small responses are left alone to avoid the compression overhead.
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # ------------------ Auth ------------------
 def auth(x_api_key: Optional[str] = Header(default=None, alias="X-API-Key")):
     if SERVER_API_KEY and x_api_key != SERVER_API_KEY:
@@ -31,19 +41,117 @@ def auth(x_api_key: Optional[str] = Header(default=None, alias="X-API-Key")):
     return True
 
 # ------------------ Supabase Client ------------------
-def get_client() -> Client:
-    if not SUPABASE_URL or not SUPABASE_KEY:
+# Created once at startup and reused: client construction builds a fresh
+# httpx/postgrest session (new TCP+TLS handshake), which we don't want per
+# request. The async variant keeps the event loop free while awaiting
+# PostgREST instead of parking a threadpool worker.
+_client: Optional[AsyncClient] = None
+
+@app.on_event("startup")
+async def startup_supabase_client():
+    global _client
+    if SUPABASE_URL and SUPABASE_KEY:
+        _client = await acreate_client(SUPABASE_URL, SUPABASE_KEY)
+
+def get_client() -> AsyncClient:
+    if _client is None:
+        raise HTTPException(status_code=500, detail="Missing Supabase environment variables")
+    return _client
+
+# Shared async HTTP client for the read hot path. One HTTP/2 connection with
+# keep-alive to PostgREST instead of a fresh TLS handshake per request, and
+# async endpoints avoid tying up a threadpool worker while waiting on it.
+httpx_client: Optional[httpx.AsyncClient] = None
+
+@app.on_event("startup")
+async def startup_httpx_client():
+    global httpx_client
+    if SUPABASE_URL and SUPABASE_KEY:
+        httpx_client = httpx.AsyncClient(
+            base_url=f"{SUPABASE_URL}/rest/v1",
+            http2=True,
+            headers={
+                "apikey": SUPABASE_KEY,
+                "Authorization": f"Bearer {SUPABASE_KEY}",
+            },
+            limits=httpx.Limits(
+                max_keepalive_connections=50,
+                max_connections=100,
+                keepalive_expiry=30.0,
+            ),
+        )
+
+@app.on_event("startup")
+async def warmup():
+    # Pay the one-time costs at boot instead of on the first user request:
+    # a throwaway query opens the TLS connection and primes PostgREST's
+    # schema cache (cold starts commonly run 500ms+), and a dummy dumps
+    # initializes orjson. Failures here are non-fatal.
+    orjson.dumps({"warmup": True})
+    if httpx_client is not None:
+        try:
+            await httpx_client.get("/studies", params={"select": "id", "limit": 1})
+        except httpx.HTTPError:
+            pass
+
+@app.on_event("shutdown")
+async def shutdown_httpx_client():
+    if httpx_client is not None:
+        await httpx_client.aclose()
+
+def get_httpx_client() -> httpx.AsyncClient:
+    if httpx_client is None:
         raise HTTPException(status_code=500, detail="Missing Supabase environment variables")
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+    return httpx_client
+
+# ------------------ Read cache ------------------
+# Small in-process TTL cache for GET /studies. The dataset changes rarely
+# compared to how often it is read, so identical queries within the TTL are
+# served without a PostgREST round trip.
+CACHE_TTL_SECONDS = float(os.getenv("STUDIES_CACHE_TTL", "30"))
+_studies_cache: Dict[Any, Any] = {}
+
+def cache_get(key):
+    entry = _studies_cache.get(key)
+    if entry is None:
+        return None
+    expires_at, data = entry
+    if time.monotonic() > expires_at:
+        _studies_cache.pop(key, None)
+        return None
+    return data
+
+def conditional_json(request: Request, payload: Any, max_age: int = 30) -> Response:
+    """Serialize payload with an ETag; answer 304 on a matching If-None-Match."""
+    body = orjson.dumps(payload, default=str)
+    etag = f'"{hashlib.md5(body).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}, stale-while-revalidate=30"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def cache_put(key, data):
+    if len(_studies_cache) > 256:
+        _studies_cache.clear()
+    _studies_cache[key] = (time.monotonic() + CACHE_TTL_SECONDS, data)
+
+def cache_invalidate():
+    """Drop all cached list responses; called after any studies write."""
+    _studies_cache.clear()
 
 # ------------------ Models ------------------
-class Intervention(BaseModel):
+class APIModel(BaseModel):
+    # Frozen, slot-backed payload objects: unknown keys are dropped at the
+    # validation boundary and instances are immutable after parsing.
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+class Intervention(APIModel):
     name: Optional[str]
     dose: Optional[str]
     route: Optional[str]
     schedule: Optional[str]
 
-class Study(BaseModel):
+class Study(APIModel):
     doi: Optional[str]
     pmid: Optional[str]
     year: Optional[int]
@@ -63,7 +171,7 @@ class Study(BaseModel):
     tags: List[str]
     intervention: Optional[Intervention]
 
-class Effect(BaseModel):
+class Effect(APIModel):
     outcome_name: str
     endpoint_level: Optional[str]
     effect_metric: str
@@ -77,27 +185,182 @@ class Effect(BaseModel):
     adjusted: Optional[bool]
     notes: Optional[str]
 
-class StudyBundle(BaseModel):
+class StudyBundle(APIModel):
     study: Study
     effects: List[Effect] = []
 
+# Columns returned by GET /studies. Deliberately excludes abstract (and the
+# search_vector): abstracts dominate row size and list views don't show them.
+LIST_COLUMNS = ",".join([
+    "id", "doi", "pmid", "year", "study_design", "n_participants", "title",
+    "journal", "population", "comparison_group", "duration_weeks", "author",
+    "core_claim", "evidence_grade", "source_url", "outcomes", "tags",
+    "intervention",
+])
+LIST_COLUMN_SET = frozenset(LIST_COLUMNS.split(","))
+
+# Sort options accepted by GET /studies, validated against a whitelist so an
+# arbitrary `order` string never reaches PostgREST. Parsed results are cached
+# since the same handful of values arrives on every request.
+ORDERABLE_COLUMNS = frozenset({"id", "year", "n_participants", "duration_weeks", "title", "study_design"})
+SORT_ALIASES = {"design": "study_design"}  # legacy sort key still sent by old clients
+_order_cache: Dict[str, str] = {}
+
+# Declarative filter table for GET /studies: (param name, PostgREST column,
+# operator template). Adding a filter means adding a row here, not another
+# branch in the handler.
+LIST_FILTERS = (
+    ("q", "search_vector", "wfts(english).{}"),
+    ("year_min", "year", "gte.{}"),
+    ("tag", "tags", "cs.{{{}}}"),
+    ("outcome", "outcomes", "cs.{{{}}}"),
+)
+
+def parse_order(order: str) -> str:
+    parsed = _order_cache.get(order)
+    if parsed is not None:
+        return parsed
+    col, _, direction = order.partition(".")
+    col = SORT_ALIASES.get(col, col)
+    if col not in ORDERABLE_COLUMNS or direction not in ("", "asc", "desc"):
+        raise HTTPException(status_code=400, detail=f"Unsupported order: {order}")
+    parsed = f"{col}.{direction or 'asc'}"
+    _order_cache[order] = parsed
+    return parsed
+
+# ------------------ Error handling ------------------
+# PostgREST failures map to one JSON 400 app-wide, so endpoints don't each
+# carry a try/except just to translate APIError.
+@app.exception_handler(APIError)
+async def handle_postgrest_error(request: Request, exc: APIError):
+    return ORJSONResponse(
+        status_code=400,
+        content={"detail": exc.args[0] if exc.args else "Supabase error"},
+    )
+
 # ------------------ Routes ------------------
 @app.get("/health")
-def health():
-    return {
+def health(request: Request):
+    return conditional_json(request, {
         "ok": True,
         "has_SUPABASE_URL": bool(SUPABASE_URL),
         "has_SUPABASE_ANON_KEY": bool(SUPABASE_KEY),
         "requires_api_key": bool(SERVER_API_KEY),
         "version": "1.0.0"
+    }, max_age=60)
+
+@app.get("/studies")
+async def list_studies(
+    request: Request,
+    q: Optional[str] = Query(default=None, min_length=2, max_length=200,
+                             description="Full-text search over title and abstract"),
+    year_min: Optional[int] = Query(default=None),
+    tag: Optional[str] = Query(default=None, description="Match studies whose tags contain this value"),
+    outcome: Optional[str] = Query(default=None, description="Match studies whose outcomes contain this value"),
+    order: str = Query(default="year.desc"),
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor_year: Optional[int] = Query(default=None, description="Keyset cursor: year of the last row seen"),
+    cursor_id: Optional[int] = Query(default=None, description="Keyset cursor: id of the last row seen"),
+    include_count: bool = Query(default=False, description="Also return the total row count for the filter"),
+    fields: Optional[str] = Query(default=None, description="Comma-separated subset of columns to return"),
+    _=Depends(auth),
+):
+    # One- or zero-character terms (after stripping) match practically every
+    # row; treat them as "no filter" rather than running the search.
+    if q:
+        q = q.strip()
+        if len(q) < 2:
+            q = None
+    # Projection: callers that only need a couple of columns shouldn't pay
+    # for the full row. Requested fields are validated against the known set.
+    if fields:
+        cols = [c.strip() for c in fields.split(",") if c.strip()]
+        unknown = [c for c in cols if c not in LIST_COLUMN_SET]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        select = ",".join(cols)
+    else:
+        select = LIST_COLUMNS
+
+    order = parse_order(order)
+    cache_key = (q, year_min, tag, outcome, order, limit, cursor_year, cursor_id, include_count, select)
+    cached = cache_get(cache_key)
+    if cached is not None:
+        return conditional_json(request, cached)
+
+    client = get_httpx_client()
+    params: Dict[str, Any] = {
+        "select": select,
+        "order": order,
+        "limit": limit,
     }
+    filter_values = {"q": q, "year_min": year_min, "tag": tag, "outcome": outcome}
+    for name, col, template in LIST_FILTERS:
+        value = filter_values[name]
+        if value is not None:
+            params[col] = template.format(value)
+    if cursor_year is not None and cursor_id is not None:
+        # Keyset pagination: resume strictly after (cursor_year, cursor_id)
+        # instead of an OFFSET scan over everything already served. Only
+        # defined for the year.desc listing, which gets an id tiebreaker so
+        # the cursor is total-ordered.
+        if order != "year.desc":
+            raise HTTPException(status_code=400, detail="Cursor pagination requires order=year.desc")
+        params["order"] = "year.desc,id.desc"
+        params["or"] = f"(year.lt.{cursor_year},and(year.eq.{cursor_year},id.lt.{cursor_id}))"
+
+    # Counting is opt-in: Prefer: count=exact makes PostgREST run a second
+    # COUNT(*) over the filter set, which can cost more than the page itself.
+    headers = {"Prefer": "count=exact"} if include_count else None
+
+    try:
+        res = await client.get("/studies", params=params, headers=headers)
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    if res.status_code >= 400:
+        raise HTTPException(status_code=400, detail=res.text)
+    data = res.json()
+    if include_count:
+        # Content-Range looks like "0-49/1234"; the total follows the slash.
+        content_range = res.headers.get("content-range", "")
+        _, _, total = content_range.partition("/")
+        data = {"data": data, "count": int(total) if total.isdigit() else None}
+    cache_put(cache_key, data)
+    return conditional_json(request, data)
+
+@app.head("/studies")
+async def head_studies(
+    q: Optional[str] = Query(default=None, min_length=2, max_length=200),
+    year_min: Optional[int] = Query(default=None),
+    tag: Optional[str] = Query(default=None),
+    outcome: Optional[str] = Query(default=None),
+    _=Depends(auth),
+):
+    """Existence check: 200 if any study matches the filters, 404 otherwise.
+    Fetches a single id - no row payload is built or transferred."""
+    client = get_httpx_client()
+    params: Dict[str, Any] = {"select": "id", "limit": 1}
+    filter_values = {"q": q, "year_min": year_min, "tag": tag, "outcome": outcome}
+    for name, col, template in LIST_FILTERS:
+        value = filter_values[name]
+        if value is not None:
+            params[col] = template.format(value)
+
+    try:
+        res = await client.get("/studies", params=params)
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    if res.status_code >= 400:
+        raise HTTPException(status_code=400, detail=res.text)
+    return Response(status_code=200 if res.json() else 404)
 
 @app.post("/studies")
-def insert_study_bundle(bundle: StudyBundle, _=Depends(auth)):
-    sb = get_client()
-    study_data = bundle.study.dict()
-    effects_data = [e.dict() for e in bundle.effects]
+async def insert_study_bundle(bundle: StudyBundle, _=Depends(auth)):
+    study_data = bundle.study.model_dump(mode="json")
+    effects_data = [e.model_dump(mode="json") for e in bundle.effects]
 
+    # Reject unkeyed payloads before touching the client: a 400 should cost
+    # no PostgREST work.
     conflict_col = None
     if study_data.get("doi"):
         conflict_col = "doi"
@@ -106,30 +369,92 @@ def insert_study_bundle(bundle: StudyBundle, _=Depends(auth)):
     else:
         raise HTTPException(status_code=400, detail="Study must have either doi or pmid for upsert.")
 
-    try:
-        study_res = sb.table("studies").upsert(
-            study_data,
+    sb = get_client()
+
+    study_res = await sb.table("studies").upsert(
+        study_data,
+        on_conflict=conflict_col,
+        returning="representation"
+    ).execute()
+
+    inserted_study = study_res.data[0]
+    doi = inserted_study.get("doi")
+    if not doi:
+        raise HTTPException(status_code=500, detail="Inserted study has no DOI — required for linking.")
+
+    if effects_data:
+        rows = [{**effect, "doi": doi} for effect in effects_data]
+        await sb.table("study_effects").insert(rows).execute()
+
+    cache_invalidate()
+    return {
+        "success": True,
+        "inserted_study": inserted_study,
+        "inserted_effects_count": len(effects_data)
+    }
+
+# PostgREST handles multi-row statements comfortably up to around this size;
+# larger batches are split so one request never carries an unbounded body.
+BULK_CHUNK_SIZE = 1000
+
+@app.post("/studies/bulk")
+async def insert_study_bundles(bundles: List[StudyBundle] = Body(...), _=Depends(auth)):
+    """Upsert many studies (and their effects) in a handful of round trips
+    instead of one POST /studies call per record."""
+    if not bundles:
+        raise HTTPException(status_code=400, detail="Empty batch.")
+
+    studies = [b.study.model_dump(mode="json") for b in bundles]
+    if all(s.get("doi") for s in studies):
+        conflict_col = "doi"
+    elif all(s.get("pmid") for s in studies):
+        conflict_col = "pmid"
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail="All studies in a batch must share a conflict key: every doi set, or every pmid set.",
+        )
+
+    sb = get_client()
+    inserted: List[Dict[str, Any]] = []
+    for i in range(0, len(studies), BULK_CHUNK_SIZE):
+        res = await sb.table("studies").upsert(
+            studies[i:i + BULK_CHUNK_SIZE],
             on_conflict=conflict_col,
             returning="representation"
         ).execute()
+        inserted.extend(res.data)
 
-        inserted_study = study_res.data[0]
-        doi = inserted_study.get("doi")
+    # Effects link to studies by DOI; when the batch is keyed on pmid, take
+    # the DOI from the returned representation.
+    doi_by_pmid = {row.get("pmid"): row.get("doi") for row in inserted}
+    effect_rows: List[Dict[str, Any]] = []
+    for bundle, study in zip(bundles, studies):
+        if not bundle.effects:
+            continue
+        doi = study.get("doi") or doi_by_pmid.get(study.get("pmid"))
         if not doi:
             raise HTTPException(status_code=500, detail="Inserted study has no DOI — required for linking.")
+        effect_rows.extend({**e.model_dump(mode="json"), "doi": doi} for e in bundle.effects)
+
+    for i in range(0, len(effect_rows), BULK_CHUNK_SIZE):
+        await sb.table("study_effects").insert(effect_rows[i:i + BULK_CHUNK_SIZE]).execute()
+
+    cache_invalidate()
+    return {
+        "success": True,
+        "inserted_studies_count": len(inserted),
+        "inserted_effects_count": len(effect_rows)
+    }
 
-        for effect in effects_data:
-            effect["doi"] = doi
-        if effects_data:
-            sb.table("study_effects").insert(effects_data).execute()
-
-        return {
-            "success": True,
-            "inserted_study": inserted_study,
-            "inserted_effects_count": len(effects_data)
-        }
-
-    except APIError as e:
-        raise HTTPException(status_code=400, detail=e.args[0] if e.args else "Supabase error")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+# ------------------ Entrypoint ------------------
+if __name__ == "__main__":
+    import uvicorn
+    # Each worker process builds its own shared httpx pool on startup;
+    # WEB_CONCURRENCY scales processes without touching the code.
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=int(os.getenv("PORT", "8000")),
+        workers=int(os.getenv("WEB_CONCURRENCY", "4")),
+    )
@@ -0,0 +1,11 @@
+-- Trigram GIN indexes for the ILIKE filters used by GET /studies.
+-- Without these, every substring search is a sequential scan over studies.
+-- Run in the Supabase SQL editor (or psql) against the project database.
+
+create extension if not exists pg_trgm;
+
+create index if not exists idx_studies_title_trgm
+    on studies using gin (title gin_trgm_ops);
+
+create index if not exists idx_studies_abstract_trgm
+    on studies using gin (abstract gin_trgm_ops);
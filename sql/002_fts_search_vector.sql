@@ -0,0 +1,13 @@
+-- Full-text search column for studies. A stored generated tsvector over
+-- title + abstract, with a GIN index, lets PostgREST serve the GET /studies
+-- text filter via the `fts`/`wfts` operators instead of trigram ILIKE.
+
+alter table studies
+    add column if not exists search_vector tsvector
+    generated always as (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(abstract, '')), 'B')
+    ) stored;
+
+create index if not exists idx_studies_search_vector
+    on studies using gin (search_vector);
@@ -0,0 +1,15 @@
+-- Composite B-tree indexes matching the GET /studies WHERE + ORDER BY
+-- patterns, so filtered lists are served by a single ordered index scan
+-- instead of filter-then-sort.
+
+-- year >= :year_min ordered by year desc (the default listing)
+create index if not exists idx_studies_year_desc
+    on studies (year desc nulls last);
+
+-- year range filter ordered by participant count
+create index if not exists idx_studies_year_n_participants
+    on studies (year desc, n_participants desc);
+
+-- conflict-target lookups used by the upsert path
+create unique index if not exists idx_studies_doi on studies (doi) where doi is not null;
+create unique index if not exists idx_studies_pmid on studies (pmid) where pmid is not null;
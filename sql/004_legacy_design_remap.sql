@@ -0,0 +1,30 @@
+-- Legacy writers used a `design` column; the API only knows `study_design`.
+-- Handle the remap once at the schema level instead of per-row in Python:
+-- backfill existing rows and keep the columns in sync with a trigger.
+-- The whole block is a no-op on databases that never had the legacy column.
+
+do $$
+begin
+    if exists (
+        select 1 from information_schema.columns
+        where table_name = 'studies' and column_name = 'design'
+    ) then
+        update studies
+            set study_design = design
+            where study_design is null and design is not null;
+
+        create or replace function remap_legacy_design() returns trigger as $fn$
+        begin
+            if new.study_design is null then
+                new.study_design := new.design;
+            end if;
+            return new;
+        end;
+        $fn$ language plpgsql;
+
+        drop trigger if exists trg_remap_legacy_design on studies;
+        create trigger trg_remap_legacy_design
+            before insert or update on studies
+            for each row execute function remap_legacy_design();
+    end if;
+end $$;
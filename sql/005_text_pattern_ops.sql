@@ -0,0 +1,13 @@
+-- B-tree indexes with text_pattern_ops so prefix LIKE/ILIKE patterns
+-- (e.g. lower(title) like 'magnesium%') get a log-N index scan on
+-- non-C-locale databases instead of a sequential scan. Exact doi/pmid
+-- lookups are already covered by the unique indexes in 003.
+
+create index if not exists idx_studies_title_tpo
+    on studies (lower(title) text_pattern_ops);
+
+create index if not exists idx_studies_author_tpo
+    on studies (lower(author) text_pattern_ops);
+
+create index if not exists idx_studies_population_tpo
+    on studies (lower(population) text_pattern_ops);
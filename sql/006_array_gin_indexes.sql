@@ -0,0 +1,9 @@
+-- GIN indexes on the array columns so `tags @> ARRAY['x']` / `outcomes @>`
+-- contains filters (PostgREST `cs` operator) use a bitmap index scan
+-- instead of scanning every row.
+
+create index if not exists idx_studies_tags_gin
+    on studies using gin (tags);
+
+create index if not exists idx_studies_outcomes_gin
+    on studies using gin (outcomes);
@@ -0,0 +1,15 @@
+-- Composite covering indexes for the dominant filter + year.desc sort
+-- shapes, so small LIMITed pages come straight off an ordered index scan
+-- with no separate sort step. The schema here has no hazard_ratio column;
+-- evidence_grade and duration_weeks are the range/equality companions
+-- actually present.
+
+create index if not exists idx_studies_evgrade_year
+    on studies (evidence_grade, year desc);
+
+create index if not exists idx_studies_year_duration
+    on studies (year desc, duration_weeks)
+    include (id, title, evidence_grade);
+
+-- Keep query stats on so future index work is driven by real top-N queries.
+create extension if not exists pg_stat_statements;